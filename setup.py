@@ -22,10 +22,12 @@ with open(pjoin(here, 'README.md'), encoding='utf-8') as f:
     long_description = f.read()
 
 requires = [
+    'httpx[http2]>=0.18.0',
+    'numpy>=1.16.0',
     'ipython>=7.0.1',
+    'orjson>=3.0.0',
     'pillow>=5.3.0',
-    'pandas>=0.22.0',
-    'ujson>=1.35',
+    'pandas>=1.0.0',
 ]
 
 requires_dev = [
@@ -65,5 +67,6 @@ setup(
     install_requires=requires,
     extras_require={
         'dev': requires_dev,
+        'arrow': ['pyarrow>=1.0.0'],
     },
 )
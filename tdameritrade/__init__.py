@@ -1,2 +1,3 @@
 from .client import TDClient  # noqa: F401
+from .async_client import AsyncTDClient  # noqa: F401
 from ._version import __version__  # noqa: F401
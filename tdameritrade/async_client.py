@@ -0,0 +1,195 @@
+import asyncio
+
+import httpx
+import orjson
+
+from tdameritrade import auth
+
+from .client import (GET_RETRIES, TIMEOUT, _TDClientBase, _accountFields, _json,
+                     _params, _retryDelay, _symbols)
+from .urls import (ACCOUNTS, HISTORY_FMT, INSTRUMENTS, MOVERS_FMT, OPTIONCHAIN,
+                   ORDERS_FMT, ORDER_REPLACE_FMT, QUOTES, SEARCH)
+
+
+class AsyncTDClient(_TDClientBase):
+    """asyncio counterpart of `TDClient`.
+
+    Every endpoint is a coroutine sharing one HTTP/2 connection pool, so
+    independent calls can be overlapped with `asyncio.gather`:
+
+        async with AsyncTDClient(clientId, refreshToken) as tdc:
+            quotes = await asyncio.gather(*(tdc.quote(s) for s in symbols))
+    """
+
+    def __init__(self, clientId=None, refreshToken=None, accountIds=[]):
+        super(AsyncTDClient, self).__init__(clientId, refreshToken, accountIds)
+        self._client = httpx.AsyncClient(http2=True, timeout=TIMEOUT)
+        # Created on first use: before 3.10 a Lock binds to the loop that
+        # is current when it is built, which may not be the running one.
+        self._tokenLock = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def _get(self, url, **kwargs):
+        kwargs['params'] = _params(kwargs.get('params'))
+        for attempt in range(GET_RETRIES + 1):
+            resp = await self._client.get(url, **kwargs)
+            delay = _retryDelay(resp, attempt)
+            if delay is None:
+                return resp
+            await asyncio.sleep(delay)
+
+    async def _updateAccessTokenIfExpired(self):
+        if not self._accessTokenExpired():
+            return
+        # Concurrent calls on an expired token wait for a single refresh
+        if self._tokenLock is None:
+            self._tokenLock = asyncio.Lock()
+        async with self._tokenLock:
+            if self._accessTokenExpired():
+                token = await auth.access_token_async(self._refreshToken['token'],
+                                                      self._clientId,
+                                                      self._client)
+                self._setAccessToken(token)
+
+    async def _fetch_account(self, acc, fields):
+        resp = await self._get(ACCOUNTS + str(acc) + fields,
+                               headers=self._headers())
+        if resp.status_code == 200:
+            return orjson.loads(resp.content)
+        raise Exception(resp.text)
+
+    async def accounts(self, positions=False, orders=False):
+        ret = {}
+        fields = _accountFields(positions, orders)
+
+        await self._updateAccessTokenIfExpired()
+        if self._accountIds:
+            accounts = await asyncio.gather(
+                *(self._fetch_account(acc, fields) for acc in self._accountIds))
+            ret = dict(zip(self._accountIds, accounts))
+        else:
+            resp = await self._get(ACCOUNTS + fields,
+                                   headers=self._headers())
+            if resp.status_code == 200:
+                for account in orjson.loads(resp.content):
+                    ret[account['securitiesAccount']['accountId']] = account
+            else:
+                raise Exception(resp.text)
+
+        return ret
+
+    async def search(self, symbol, projection='symbol-search'):
+        await self._updateAccessTokenIfExpired()
+        resp = await self._get(SEARCH,
+                               headers=self._headers(),
+                               params={'symbol': symbol,
+                                       'projection': projection})
+        return _json(resp)
+
+    async def fundamental(self, symbol):
+        return await self.search(symbol, 'fundamental')
+
+    async def instrument(self, cusip):
+        await self._updateAccessTokenIfExpired()
+        resp = await self._get(INSTRUMENTS + str(cusip),
+                               headers=self._headers())
+        return _json(resp)
+
+    async def quote(self, symbol):
+        """Returns quotes keyed by symbol.
+
+        Args:
+            symbol: A symbol, or an iterable of symbols to fetch in a
+                single request.
+        """
+        await self._updateAccessTokenIfExpired()
+        resp = await self._get(QUOTES,
+                               headers=self._headers(),
+                               params={'symbol': _symbols(symbol)})
+        return _json(resp)
+
+    async def history(self, symbol, **kwargs):
+        await self._updateAccessTokenIfExpired()
+        resp = await self._get(HISTORY_FMT(symbol),
+                               headers=self._headers(),
+                               params=kwargs)
+        return _json(resp)
+
+    async def options(self, symbol, **kwargs):
+        await self._updateAccessTokenIfExpired()
+        resp = await self._get(OPTIONCHAIN,
+                               headers=self._headers(),
+                               params={'symbol': symbol.upper(), **kwargs})
+        return _json(resp)
+
+    async def movers(self, index, direction='up', change_type='percent'):
+        await self._updateAccessTokenIfExpired()
+        resp = await self._get(MOVERS_FMT(index),
+                               headers=self._headers(),
+                               params={'direction': direction,
+                                       'change_type': change_type})
+        return _json(resp)
+
+    async def place_order(self, account_id, order_dict):
+        """Places an order specified by `order_dict`.
+
+        For order specification, see the `TDClient.place_order()` function docs.
+
+        Args:
+            account_id: Id of the account.
+            order_dict: The order specification dictionary.
+
+        Returns:
+            The `httpx.Response` of the request; check `resp.is_success`
+            or `resp.status_code` (there is no `.ok`).
+        """
+        await self._updateAccessTokenIfExpired()
+        return await self._client.post(ORDERS_FMT(account_id),
+                                       headers=self._headers(),
+                                       content=orjson.dumps(order_dict))
+
+    async def replace_order(self, account_id, order_id, order_dict):
+        """Replaces the order given by `order_id` with the new order.
+        The old order will be cancelled and the new order will be created.
+
+        For order specification, see the `TDClient.place_order()` function docs.
+
+        Args:
+            account_id: Id of the account.
+            order_id: Id of the order to replace.
+            order_dict: The order specification dictionary.
+
+        Returns:
+            The `httpx.Response` of the request; check `resp.is_success`
+            or `resp.status_code` (there is no `.ok`).
+        """
+        await self._updateAccessTokenIfExpired()
+        return await self._client.put(ORDER_REPLACE_FMT(account_id, order_id),
+                                      headers=self._headers(),
+                                      content=orjson.dumps(order_dict))
+
+    async def get_orders(self, account_id, **kwargs):
+        """Returns the orders for the account.
+
+        For allowed arguments, see https://developer.tdameritrade.com/
+        account-access/apis/get/accounts/%7BaccountId%7D/orders-0
+
+        Args:
+            account_id: Id of the account.
+
+        Returns:
+            A list of orders for the account.
+        """
+        await self._updateAccessTokenIfExpired()
+        resp = await self._get(ORDERS_FMT(account_id),
+                               headers=self._headers(),
+                               params={**kwargs})
+        return _json(resp)
@@ -8,6 +8,8 @@ from shutil import which
 import requests
 from selenium import webdriver
 
+from ..urls import TOKEN
+
 
 def authentication(client_id, redirect_uri, tdauser=None, tdapass=None):
     client_id = client_id + '@AMER.OAUTHAP'
@@ -65,7 +67,7 @@ def authentication(client_id, redirect_uri, tdauser=None, tdapass=None):
 
     driver.close()
 
-    resp = requests.post('https://api.tdameritrade.com/v1/oauth2/token',
+    resp = requests.post(TOKEN,
                          headers={'Content-Type': 'application/x-www-form-urlencoded'},
                          data={'grant_type': 'authorization_code',
                                'refresh_token': '',
@@ -73,22 +75,32 @@ def authentication(client_id, redirect_uri, tdauser=None, tdapass=None):
                                'code': code,
                                'client_id': client_id,
                                'redirect_uri': redirect_uri})
-    if resp.status_code != 200:
-        raise Exception('Could not authenticate!')
-    return resp.json()
+    return _token(resp)
 
 
-def access_token(refresh_token, client_id):
-    resp = requests.post('https://api.tdameritrade.com/v1/oauth2/token',
-                         headers={'Content-Type': 'application/x-www-form-urlencoded'},
-                         data={'grant_type': 'refresh_token',
-                               'refresh_token': refresh_token,
-                               'client_id': client_id})
+def _refresh_request(refresh_token, client_id):
+    return {'headers': {'Content-Type': 'application/x-www-form-urlencoded'},
+            'data': {'grant_type': 'refresh_token',
+                     'refresh_token': refresh_token,
+                     'client_id': client_id}}
+
+
+def _token(resp):
     if resp.status_code != 200:
         raise Exception('Could not authenticate!')
     return resp.json()
 
 
+def access_token(refresh_token, client_id, session=None):
+    # Reuse the caller's requests/httpx session, if given, to keep its connection warm
+    return _token((session or requests).post(TOKEN, **_refresh_request(refresh_token, client_id)))
+
+
+async def access_token_async(refresh_token, client_id, session):
+    """Like `access_token`, but posts with an `httpx.AsyncClient` session."""
+    return _token(await session.post(TOKEN, **_refresh_request(refresh_token, client_id)))
+
+
 def main():
     client_id = input('client id:')
     redirect_uri = input('redirect uri:')
@@ -1,74 +1,201 @@
-import json
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+import httpx
+import numpy as np
+import orjson
 import pandas as pd
-import requests
+from pandas import json_normalize
 
-from tdameritrade import auth
+try:
+    import pyarrow as pa
+    import pyarrow.json as pajson
+except ImportError:
+    pa = None
 
-from .urls import (ACCOUNTS, HISTORY, INSTRUMENTS, MOVERS, OPTIONCHAIN, ORDERS,
-                   ORDER_REPLACE, QUOTES, SEARCH)
+from tdameritrade import auth
 
-class TDClient(object):
+from .urls import (ACCOUNTS, HISTORY_FMT, INSTRUMENTS, MOVERS_FMT, OPTIONCHAIN,
+                   ORDERS_FMT, ORDER_REPLACE_FMT, QUOTES, SEARCH)
+
+CANDLE_COLS = ('open', 'high', 'low', 'close', 'volume', 'datetime')
+if pa is not None:
+    CANDLE_SCHEMA = pa.schema([('open', pa.float64()),
+                               ('high', pa.float64()),
+                               ('low', pa.float64()),
+                               ('close', pa.float64()),
+                               ('volume', pa.int64()),
+                               ('datetime', pa.int64())])
+OPTION_COLS = ('putCall', 'symbol', 'description', 'exchangeName',
+               'bid', 'ask', 'last', 'mark', 'bidSize', 'askSize',
+               'bidAskSize', 'lastSize', 'highPrice', 'lowPrice',
+               'openPrice', 'closePrice', 'totalVolume', 'tradeDate',
+               'tradeTimeInLong', 'quoteTimeInLong', 'netChange',
+               'volatility', 'delta', 'gamma', 'theta', 'vega', 'rho',
+               'openInterest', 'timeValue', 'theoreticalOptionValue',
+               'theoreticalVolatility', 'optionDeliverablesList',
+               'strikePrice', 'expirationDate', 'daysToExpiration',
+               'expirationType', 'lastTradingDay', 'multiplier',
+               'settlementType', 'deliverableNote', 'isIndexOption',
+               'percentChange', 'markChange', 'markPercentChange',
+               'intrinsicValue', 'pennyPilot', 'nonStandard', 'inTheMoney',
+               'mini')
+OPTION_TIME_COLS = ('tradeTimeInLong', 'quoteTimeInLong',
+                    'expirationDate', 'lastTradingDay')
+SEARCH_CACHE_SECS = 300
+FUNDAMENTAL_CACHE_SECS = 3600
+_NAT = np.datetime64('NaT').view('i8')
+# GETs are idempotent, so rate limiting and transient errors are retried
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+GET_RETRIES = 3
+RETRY_BACKOFF_SECS = 0.3
+# httpx defaults to a 5s timeout; large option chains can take longer than
+# that to start responding
+TIMEOUT = httpx.Timeout(10.0, read=60.0)
+
+
+def _json(resp):
+    resp.raise_for_status()
+    return orjson.loads(resp.content)
+
+
+def _params(params):
+    # httpx sends None-valued params as empty strings; requests dropped them
+    if params:
+        return {k: v for k, v in params.items() if v is not None}
+    return params
+
+
+def _retryDelay(resp, attempt):
+    # Seconds to wait before retrying a GET, or None to return `resp`
+    if resp.status_code not in RETRY_STATUSES or attempt == GET_RETRIES:
+        return None
+    return RETRY_BACKOFF_SECS * 2 ** attempt
+
+
+def _accountFields(positions, orders):
+    if positions and orders:
+        return '?fields=positions,orders'
+    if positions:
+        return '?fields=positions'
+    if orders:
+        return '?fields=orders'
+    return ''
+
+
+def _msToDatetime(values):
+    # Epoch millis are bit-identical to datetime64[ms], so just reinterpret.
+    # Missing values map to NaT's int64 representation.
+    if None in values:
+        values = [_NAT if v is None else v for v in values]
+    return np.asarray(values, dtype='i8').view('datetime64[ms]')
+
+
+def _searchCacheSecs(projection):
+    return FUNDAMENTAL_CACHE_SECS if projection == 'fundamental' else SEARCH_CACHE_SECS
+
+
+def _symbols(symbol):
+    if isinstance(symbol, str):
+        return symbol.upper()
+    return ','.join(s.upper() for s in symbol)
+
+
+class _TDClientBase(object):
+    """Token and header state shared by `TDClient` and `AsyncTDClient`."""
 
     def __init__(self, clientId=None, refreshToken=None, accountIds=[]):
         self._clientId = clientId
         self._refreshToken = {'token': refreshToken}
         self._accessToken = {'token': ''}
-        self._accessToken['created_at'] = time.time()
-        # Set to -1 so that it gets refreshed immediately and its age tracked.
-        self._accessToken['expires_in'] = -1
+        # Already expired so that it gets refreshed on the first call.
+        self._tokenExpiresAt = 0
+        self._cachedHeaders = {
+            'Authorization': 'Bearer ',
+            'Content-Type': 'application/json'
+        }
         self._accountIds = accountIds
 
     def _headers(self):
-        return {
-            'Authorization': 'Bearer ' + self._accessToken['token'],
+        return self._cachedHeaders
+
+    def _accessTokenExpired(self):
+        return time.time() >= self._tokenExpiresAt
+
+    def _setAccessToken(self, token):
+        self._accessToken['token'] = token['access_token']
+        # Expire the token one minute before its expiration time to
+        # be safe
+        self._tokenExpiresAt = time.time() + token['expires_in'] - 60
+        # Headers only change with the token, so build them once per refresh
+        self._cachedHeaders = {
+            'Authorization': 'Bearer ' + token['access_token'],
             'Content-Type': 'application/json'
         }
 
+
+class TDClient(_TDClientBase):
+
+    def __init__(self, clientId=None, refreshToken=None, accountIds=[]):
+        super(TDClient, self).__init__(clientId, refreshToken, accountIds)
+        # (symbol, projection) -> (fetched at, response body)
+        self._searchCache = {}
+        # One HTTP/2 connection to the API host multiplexes concurrent calls
+        self._client = httpx.Client(transport=httpx.HTTPTransport(
+            http2=True, retries=3,
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=8)),
+            timeout=TIMEOUT)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._client.close()
+
+    def _get(self, url, **kwargs):
+        kwargs['params'] = _params(kwargs.get('params'))
+        for attempt in range(GET_RETRIES + 1):
+            resp = self._client.get(url, **kwargs)
+            delay = _retryDelay(resp, attempt)
+            if delay is None:
+                return resp
+            time.sleep(delay)
+
     def _updateAccessTokenIfExpired(self):
-        # Expire the token one minute before its expiration time to
-        # be safe
-        if not self._accessToken['token'] or \
-                self._accessTokenAgeSecs() >= self._accessToken['expires_in'] - 60:
+        if self._accessTokenExpired():
             token = auth.access_token(self._refreshToken['token'],
-                                      self._clientId)
-            self._accessToken['token'] = token['access_token']
-            self._accessToken['created_at'] = time.time()
-            self._accessToken['expires_in'] = token['expires_in']
-
-    def _accessTokenAgeSecs(self):
-        return time.time() - self._accessToken['created_at']
+                                      self._clientId,
+                                      session=self._client)
+            self._setAccessToken(token)
+
+    def _fetch_account(self, acc, fields):
+        # The caller refreshes the token; it carries a 60s safety margin,
+        # so it cannot lapse between the back-to-back account requests.
+        resp = self._get(ACCOUNTS + str(acc) + fields,
+                         headers=self._headers())
+        if resp.status_code == 200:
+            return acc, orjson.loads(resp.content)
+        raise Exception(resp.text)
 
     def accounts(self, positions=False, orders=False):
         ret = {}
-
-        if positions or orders:
-            fields = '?fields='
-            if positions:
-                fields += 'positions'
-                if orders:
-                    fields += ',orders'
-            elif orders:
-                fields += 'orders'
-        else:
-            fields = ''
+        fields = _accountFields(positions, orders)
 
         if self._accountIds:
-            for acc in self._accountIds:
-                self._updateAccessTokenIfExpired()
-                resp = requests.get(ACCOUNTS + str(acc) + fields,
-                                    headers=self._headers())
-                if resp.status_code == 200:
-                    ret[acc] = resp.json()
-                else:
-                    raise Exception(resp.text)
+            # Refresh once up front so the workers share the same token
+            self._updateAccessTokenIfExpired()
+            with ThreadPoolExecutor(max_workers=min(8, len(self._accountIds))) as ex:
+                ret = dict(ex.map(lambda acc: self._fetch_account(acc, fields),
+                                  self._accountIds))
         else:
             self._updateAccessTokenIfExpired()
-            resp = requests.get(ACCOUNTS + fields, headers=self._headers())
+            resp = self._get(ACCOUNTS + fields, headers=self._headers())
             if resp.status_code == 200:
-                for account in resp.json():
+                for account in orjson.loads(resp.content):
                     ret[account['securitiesAccount']['accountId']] = account
             else:
                 raise Exception(resp.text)
@@ -76,23 +203,33 @@ class TDClient(object):
         return ret
 
     def accountsDF(self):
-        return pd.io.json.json_normalize(self.accounts())
+        return json_normalize(list(self.accounts().values()), sep='.')
 
     def search(self, symbol, projection='symbol-search'):
-        self._updateAccessTokenIfExpired()
+        # Reference data changes slowly, so serve repeat lookups from cache.
+        # The raw body is cached and re-parsed on every hit, so callers never
+        # share (and can't corrupt) the cached objects.
+        key = (symbol, projection)
+        now = time.time()
+        cached = self._searchCache.get(key)
+        if cached and now - cached[0] < _searchCacheSecs(projection):
+            return orjson.loads(cached[1])
 
-        return requests.get(SEARCH,
-                            headers=self._headers(),
-                            params={'symbol': symbol,
-                                    'projection': projection}).json()
+        self._updateAccessTokenIfExpired()
+        resp = self._get(SEARCH,
+                         headers=self._headers(),
+                         params={'symbol': symbol,
+                                 'projection': projection})
+        resp.raise_for_status()
+
+        # Drop stale entries so the cache doesn't grow without bound
+        self._searchCache = {k: v for k, v in self._searchCache.items()
+                             if now - v[0] < _searchCacheSecs(k[1])}
+        self._searchCache[key] = (now, resp.content)
+        return orjson.loads(resp.content)
 
     def searchDF(self, symbol, projection='symbol-search'):
-        ret = []
-        dat = self.search(symbol, projection)
-        for symbol in dat:
-            ret.append(dat[symbol])
-
-        return pd.DataFrame(ret)
+        return pd.DataFrame(list(self.search(symbol, projection).values()))
 
     def fundamental(self, symbol):
         return self.search(symbol, 'fundamental')
@@ -103,67 +240,85 @@ class TDClient(object):
     def instrument(self, cusip):
         self._updateAccessTokenIfExpired()
 
-        return requests.get(INSTRUMENTS + str(cusip),
-                            headers=self._headers()).json()
+        return _json(self._get(INSTRUMENTS + str(cusip),
+                               headers=self._headers()))
 
     def instrumentDF(self, cusip):
         return pd.DataFrame(self.instrument(cusip))
 
     def quote(self, symbol):
+        """Returns quotes keyed by symbol.
+
+        Args:
+            symbol: A symbol, or an iterable of symbols to fetch in a
+                single request.
+        """
         self._updateAccessTokenIfExpired()
 
-        return requests.get(QUOTES,
-                            headers=self._headers(),
-                            params={'symbol': symbol.upper()}).json()
+        return _json(self._get(QUOTES,
+                               headers=self._headers(),
+                               params={'symbol': _symbols(symbol)}))
 
     def quoteDF(self, symbol):
         x = self.quote(symbol)
 
-        return pd.DataFrame(x).T.reset_index(drop=True)
+        return pd.DataFrame.from_dict(x, orient='index').reset_index(drop=True)
 
     def history(self, symbol, **kwargs):
         self._updateAccessTokenIfExpired()
-        return requests.get(HISTORY % symbol,
-                            headers=self._headers(),
-                            params=kwargs).json()
+        return _json(self._get(HISTORY_FMT(symbol),
+                               headers=self._headers(),
+                               params=kwargs))
 
     def historyDF(self, symbol, **kwargs):
-        x = self.history(symbol, **kwargs)
-        df = pd.DataFrame(x['candles'])
-        df['datetime'] = pd.to_datetime(df['datetime'], unit='ms')
-
-        return df
+        candles = self.history(symbol, **kwargs)['candles']
+        if pa is not None and candles:
+            # Let Arrow's typed JSON reader build the columns
+            table = pajson.read_json(
+                pa.BufferReader(b'\n'.join(orjson.dumps(c) for c in candles)),
+                parse_options=pajson.ParseOptions(explicit_schema=CANDLE_SCHEMA,
+                                                  unexpected_field_behavior='ignore'))
+            i = CANDLE_COLS.index('datetime')
+            table = table.set_column(i, 'datetime', table['datetime'].cast(pa.timestamp('ms')))
+            return table.to_pandas()
+
+        # Same dtypes as CANDLE_SCHEMA; missing fields become NaN/NaT
+        cols = {k: [c.get(k) for c in candles] for k in CANDLE_COLS}
+        for k in ('open', 'high', 'low', 'close'):
+            cols[k] = np.asarray(cols[k], dtype='f8')
+        cols['volume'] = np.asarray(cols['volume'], dtype='f8' if None in cols['volume'] else 'i8')
+        cols['datetime'] = _msToDatetime(cols['datetime'])
+
+        return pd.DataFrame(cols, copy=False)
 
     def options(self, symbol, **kwargs):
         self._updateAccessTokenIfExpired()
 
-        return requests.get(OPTIONCHAIN,
-                            headers=self._headers(),
-                            params={'symbol': symbol.upper(), **kwargs}).json()
+        return _json(self._get(OPTIONCHAIN,
+                               headers=self._headers(),
+                               params={'symbol': symbol.upper(), **kwargs}))
 
     def optionsDF(self, symbol):
-        ret = []
         dat = self.options(symbol)
-        for date in dat['callExpDateMap']:
-            for strike in dat['callExpDateMap'][date]:
-                ret.extend(dat['callExpDateMap'][date][strike])
-        for date in dat['putExpDateMap']:
-            for strike in dat['putExpDateMap'][date]:
-                ret.extend(dat['putExpDateMap'][date][strike])
+        cols = {k: [] for k in OPTION_COLS}
+        for expDateMap in (dat['callExpDateMap'], dat['putExpDateMap']):
+            for strikes in expDateMap.values():
+                for contracts in strikes.values():
+                    for contract in contracts:
+                        for k in OPTION_COLS:
+                            cols[k].append(contract.get(k))
 
-        df = pd.DataFrame(ret)
-        for col in ('tradeTimeInLong', 'quoteTimeInLong',
-                    'expirationDate', 'lastTradingDay'):
-            df[col] = pd.to_datetime(df[col], unit='ms')
+        for col in OPTION_TIME_COLS:
+            cols[col] = _msToDatetime(cols[col])
 
-        return df
+        return pd.DataFrame(cols, copy=False)
 
     def movers(self, index, direction='up', change_type='percent'):
         self._updateAccessTokenIfExpired()
-        return requests.get(MOVERS % index,
-                            headers=self._headers(),
-                            params={'direction': direction,
-                                    'change_type': change_type}).json()
+        return _json(self._get(MOVERS_FMT(index),
+                               headers=self._headers(),
+                               params={'direction': direction,
+                                       'change_type': change_type}))
 
     def place_order(self, account_id, order_dict):
         """Places an order specified by `order_dict`.
@@ -194,11 +349,16 @@ class TDClient(object):
         Args:
             account_id: Id of the account.
             order_dict: The order specification dictionary.
+
+        Returns:
+            The `httpx.Response` of the request. Note that it has no
+            `requests`-style `.ok`; check `resp.is_success` or
+            `resp.status_code` instead.
         """
         self._updateAccessTokenIfExpired()
-        return requests.post(ORDERS % account_id,
-                             headers=self._headers(),
-                             data=json.dumps(order_dict))
+        return self._client.post(ORDERS_FMT(account_id),
+                                 headers=self._headers(),
+                                 content=orjson.dumps(order_dict))
 
     def replace_order(self, account_id, order_id, order_dict):
         """Replaces the order given by `order_id` with the new order.
@@ -210,11 +370,16 @@ class TDClient(object):
             account_id: Id of the account.
             order_id: Id of the order to replace.
             order_dict: The order specification dictionary.
+
+        Returns:
+            The `httpx.Response` of the request. Note that it has no
+            `requests`-style `.ok`; check `resp.is_success` or
+            `resp.status_code` instead.
         """
         self._updateAccessTokenIfExpired()
-        return requests.put(ORDER_REPLACE % (account_id, order_id),
-                            headers=self._headers(),
-                            data=json.dumps(order_dict))
+        return self._client.put(ORDER_REPLACE_FMT(account_id, order_id),
+                                headers=self._headers(),
+                                content=orjson.dumps(order_dict))
 
     def get_orders(self, account_id, **kwargs):
         """Returns the orders for the account.
@@ -229,7 +394,7 @@ class TDClient(object):
             A list of orders for the account.
         """
         self._updateAccessTokenIfExpired()
-        return requests.get(ORDERS % account_id,
-                            headers=self._headers(),
-                            params={**kwargs}).json()
+        return _json(self._get(ORDERS_FMT(account_id),
+                               headers=self._headers(),
+                               params={**kwargs}))
 
@@ -0,0 +1,108 @@
+# for Coverage
+import asyncio
+import unittest
+
+import orjson
+from mock import MagicMock, patch
+
+
+def _response(payload):
+    resp = MagicMock()
+    resp.status_code = 200
+    resp.content = orjson.dumps(payload)
+    resp.json.return_value = payload
+    return resp
+
+
+class TestAsyncClient(unittest.TestCase):
+    def test_init(self):
+        from tdameritrade import AsyncTDClient
+        tdc = AsyncTDClient(clientId=123, refreshToken='reftoken',
+                            accountIds=[1, 2])
+        self.assertEqual(tdc._refreshToken['token'], 'reftoken')
+        from tdameritrade.client import TIMEOUT
+        self.assertEqual(tdc._client.timeout, TIMEOUT)
+        asyncio.run(tdc.aclose())
+
+    def test_accounts(self):
+        from tdameritrade import AsyncTDClient
+
+        async def run():
+            async def get(url, **kwargs):
+                return _response({'url': url})
+
+            async def refresh():
+                pass
+
+            async with AsyncTDClient(clientId=123, refreshToken='reftoken',
+                                     accountIds=[1, 2]) as tdc:
+                with patch.object(tdc, '_updateAccessTokenIfExpired', new=refresh), \
+                        patch.object(tdc._client, 'get', new=get):
+                    return await tdc.accounts()
+
+        ret = asyncio.run(run())
+        self.assertEqual(list(ret), [1, 2])
+        self.assertTrue(ret[2]['url'].endswith('accounts/2'))
+
+    def test_quote(self):
+        from tdameritrade import AsyncTDClient
+
+        async def run():
+            async def get(url, **kwargs):
+                return _response({kwargs['params']['symbol']: {'test': 1}})
+
+            async def refresh():
+                pass
+
+            async with AsyncTDClient(clientId=123, refreshToken='reftoken') as tdc:
+                with patch.object(tdc, '_updateAccessTokenIfExpired', new=refresh), \
+                        patch.object(tdc._client, 'get', new=get):
+                    return await asyncio.gather(tdc.quote('aapl'), tdc.quote('msft'))
+
+        self.assertEqual(asyncio.run(run()),
+                         [{'AAPL': {'test': 1}}, {'MSFT': {'test': 1}}])
+
+    def test_place_order(self):
+        from tdameritrade import AsyncTDClient
+
+        async def run():
+            sent = {}
+
+            async def post(url, **kwargs):
+                sent.update(kwargs)
+                return _response({})
+
+            async def refresh():
+                pass
+
+            async with AsyncTDClient(clientId=123, refreshToken='reftoken') as tdc:
+                with patch.object(tdc, '_updateAccessTokenIfExpired', new=refresh), \
+                        patch.object(tdc._client, 'post', new=post):
+                    await tdc.place_order(1, {'orderType': 'LIMIT', 'price': 36})
+            return sent
+
+        sent = asyncio.run(run())
+        self.assertEqual(orjson.loads(sent['content']), {'orderType': 'LIMIT', 'price': 36})
+
+    def test_refresh_once(self):
+        from tdameritrade import AsyncTDClient
+
+        async def run():
+            posts = []
+
+            async def post(url, **kwargs):
+                posts.append(url)
+                await asyncio.sleep(0)
+                return _response({'access_token': 'acctoken', 'expires_in': 1800})
+
+            async def get(url, **kwargs):
+                return _response({})
+
+            async with AsyncTDClient(clientId=123, refreshToken='reftoken') as tdc:
+                with patch.object(tdc._client, 'post', new=post), \
+                        patch.object(tdc._client, 'get', new=get):
+                    await asyncio.gather(*(tdc.quote(str(i)) for i in range(10)))
+                self.assertEqual(tdc._headers()['Authorization'], 'Bearer acctoken')
+            return posts
+
+        self.assertEqual(asyncio.run(run()), ['https://api.tdameritrade.com/v1/oauth2/token'])
@@ -1,8 +1,16 @@
 # for Coverage
+import time
 import unittest
 
+import orjson
+import pandas as pd
 from mock import MagicMock, patch
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 
 class TestClient(unittest.TestCase):
     def setup(self):
@@ -29,6 +37,27 @@ class TestClient(unittest.TestCase):
                        accountIds=[1, 2])
         self.assertEqual(tdc._refreshToken['token'], 'reftoken')
 
+    def test_timeout(self):
+        from tdameritrade import TDClient
+        from tdameritrade.client import TIMEOUT
+        tdc = TDClient(clientId=123, refreshToken='reftoken')
+        self.assertEqual(tdc._client.timeout, TIMEOUT)
+        self.assertEqual(tdc._client.timeout.read, 60.0)
+
+    @patch('tdameritrade.auth.access_token')
+    def test_headers(self, mock_at):
+        from tdameritrade import TDClient
+        tdc = TDClient(clientId=123, refreshToken='reftoken')
+
+        mock_at.return_value = {'access_token': 'acctoken', 'expires_in': 1800}
+        tdc._updateAccessTokenIfExpired()
+        self.assertIs(mock_at.call_args[1]['session'], tdc._client)
+        self.assertEqual(tdc._headers()['Authorization'], 'Bearer acctoken')
+        self.assertIs(tdc._headers(), tdc._headers())
+
+        tdc._updateAccessTokenIfExpired()
+        self.assertEqual(mock_at.call_count, 1)
+
     @patch('tdameritrade.TDClient._updateAccessTokenIfExpired')
     def test_accounts(self, mock_rtie):
         from tdameritrade import TDClient
@@ -36,22 +65,45 @@ class TestClient(unittest.TestCase):
         tdc = TDClient(clientId=123, refreshToken='reftoken',
                        accountIds=[1, 2])
 
-        with patch('requests.get') as m:
+        with patch('httpx.Client.get') as m:
             m.return_value.status_code = 200
-            m.return_value.json.return_value = [MagicMock()]
-            tdc.accounts()
+            m.return_value.content = orjson.dumps([{'securitiesAccount': {'accountId': 1}}])
+            self.assertEqual(list(tdc.accounts()), [1, 2])
+            self.assertEqual(m.call_count, 2)
 
         tdc = TDClient(clientId=123, refreshToken='reftoken',
                        accountIds=[1, 2])
 
-        with patch('requests.get') as m:
+        with patch('httpx.Client.get') as m:
+            m.return_value.status_code = 200
+            m.return_value.content = orjson.dumps([{'securitiesAccount': {'accountId': 1}}])
+
+        with patch('httpx.Client.get') as m:
             m.return_value.status_code = 200
-            m.return_value.json.return_value = [MagicMock()]
+            m.return_value.content = orjson.dumps({'securitiesAccount': {'accountId': 1, 'type': 'CASH'}})
+            df = tdc.accountsDF()
+            self.assertEqual(len(df), 2)
+            self.assertEqual(list(df['securitiesAccount.type']), ['CASH', 'CASH'])
+
+    @patch('tdameritrade.TDClient._updateAccessTokenIfExpired')
+    def test_accounts_refresh_once(self, mock_rtie):
+        from tdameritrade import TDClient
 
-        with patch('requests.get') as m:
+        tdc = TDClient(clientId=123, refreshToken='reftoken',
+                       accountIds=[1, 2, 3])
+
+        with patch('httpx.Client.get') as m:
             m.return_value.status_code = 200
-            m.return_value.json.return_value = [{'test': 1, 'test2': 2}]
-            tdc.accountsDF()
+            m.return_value.content = orjson.dumps({})
+            tdc.accounts()
+        self.assertEqual(mock_rtie.call_count, 1)
+
+    def test_account_fields(self):
+        from tdameritrade.client import _accountFields
+        self.assertEqual(_accountFields(False, False), '')
+        self.assertEqual(_accountFields(True, False), '?fields=positions')
+        self.assertEqual(_accountFields(False, True), '?fields=orders')
+        self.assertEqual(_accountFields(True, True), '?fields=positions,orders')
 
     @patch('tdameritrade.TDClient._updateAccessTokenIfExpired')
     def test_search(self, mock_rtie):
@@ -60,11 +112,61 @@ class TestClient(unittest.TestCase):
         tdc = TDClient(clientId=123, refreshToken='reftoken',
                        accountIds=[1, 2])
 
-        with patch('requests.get') as m:
+        with patch('httpx.Client.get') as m:
             m.return_value.status_code = 200
-            m.return_value.json.return_value = {'aapl': {'test': 1, 'test2': 2}}
+            m.return_value.content = orjson.dumps({'aapl': {'test': 1, 'test2': 2}})
             tdc.search('aapl')
             tdc.searchDF('aapl')
+            self.assertEqual(m.call_count, 1)
+            tdc.fundamental('aapl')
+            self.assertEqual(m.call_count, 2)
+
+            # Hits hand out fresh objects
+            tdc.search('aapl')['aapl']['test'] = 99
+            self.assertEqual(tdc.search('aapl')['aapl']['test'], 1)
+            self.assertEqual(m.call_count, 2)
+
+            # Expired entries are fetched again, and stale ones evicted
+            with patch('tdameritrade.client.time.time', return_value=time.time() + 600):
+                tdc.search('msft')
+                self.assertEqual(m.call_count, 3)
+                self.assertEqual(set(tdc._searchCache), {('msft', 'symbol-search'),
+                                                         ('aapl', 'fundamental')})
+                tdc.search('aapl')
+                self.assertEqual(m.call_count, 4)
+
+    @patch('tdameritrade.TDClient._updateAccessTokenIfExpired')
+    def test_get_orders(self, mock_rtie):
+        from tdameritrade import TDClient
+
+        tdc = TDClient(clientId=123, refreshToken='reftoken')
+
+        with patch('httpx.Client.get') as m:
+            m.return_value.status_code = 200
+            m.return_value.content = orjson.dumps([])
+            tdc.get_orders(1, fromEnteredTime=None, status='FILLED')
+            self.assertEqual(m.call_args[1]['params'], {'status': 'FILLED'})
+
+    @patch('tdameritrade.client.time.sleep')
+    @patch('tdameritrade.TDClient._updateAccessTokenIfExpired')
+    def test_get_retries(self, mock_rtie, mock_sleep):
+        from tdameritrade import TDClient
+
+        tdc = TDClient(clientId=123, refreshToken='reftoken')
+
+        with patch('httpx.Client.get') as m:
+            limited = MagicMock(status_code=429)
+            ok = MagicMock(status_code=200, content=orjson.dumps({'AAPL': {}}))
+            m.side_effect = [limited, limited, ok]
+            self.assertEqual(tdc.quote('aapl'), {'AAPL': {}})
+            self.assertEqual(m.call_count, 3)
+            self.assertEqual(mock_sleep.call_count, 2)
+
+            m.reset_mock()
+            m.side_effect = None
+            m.return_value = limited
+            self.assertIs(tdc._get('url'), limited)
+            self.assertEqual(m.call_count, 4)
 
     @patch('tdameritrade.TDClient._updateAccessTokenIfExpired')
     def test_instrument(self, mock_rtie):
@@ -73,9 +175,9 @@ class TestClient(unittest.TestCase):
         tdc = TDClient(clientId=123, refreshToken='reftoken',
                        accountIds=[1, 2])
 
-        with patch('requests.get') as m:
+        with patch('httpx.Client.get') as m:
             m.return_value.status_code = 200
-            m.return_value.json.return_value = {'aapl': {'test': 1, 'test2': 2}}
+            m.return_value.content = orjson.dumps({'aapl': {'test': 1, 'test2': 2}})
             tdc.instrument('aapl')
             tdc.instrumentDF('aapl')
 
@@ -86,12 +188,19 @@ class TestClient(unittest.TestCase):
         tdc = TDClient(clientId=123, refreshToken='reftoken',
                        accountIds=[1, 2])
 
-        with patch('requests.get') as m:
+        with patch('httpx.Client.get') as m:
             m.return_value.status_code = 200
-            m.return_value.json.return_value = {'aapl': {'test': 1, 'test2': 2}}
+            m.return_value.content = orjson.dumps({'aapl': {'test': 1, 'test2': 2}})
             tdc.quote('aapl')
             tdc.quoteDF('aapl')
 
+        with patch('httpx.Client.get') as m:
+            m.return_value.status_code = 200
+            m.return_value.content = orjson.dumps({'AAPL': {'test': 1}, 'MSFT': {'test': 2}})
+            df = tdc.quoteDF(['aapl', 'msft'])
+            self.assertEqual(m.call_args[1]['params'], {'symbol': 'AAPL,MSFT'})
+            self.assertEqual(list(df['test']), [1, 2])
+
     @patch('tdameritrade.TDClient._updateAccessTokenIfExpired')
     def test_history(self, mock_rtie):
         from tdameritrade import TDClient
@@ -99,11 +208,39 @@ class TestClient(unittest.TestCase):
         tdc = TDClient(clientId=123, refreshToken='reftoken',
                        accountIds=[1, 2])
 
-        with patch('requests.get') as m:
+        with patch('httpx.Client.get') as m:
             m.return_value.status_code = 200
-            m.return_value.json.return_value = {'candles': [{'datetime': 1, 'test2': 2}]}
+            m.return_value.content = orjson.dumps({'candles': [{'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5,
+                                                                 'volume': 100, 'datetime': 1}]})
             tdc.history('aapl')
-            tdc.historyDF('aapl')
+            self.assertEqual(m.call_args[0][0], 'https://api.tdameritrade.com/v1/marketdata/aapl/pricehistory')
+            df = tdc.historyDF('aapl')
+            self.assertEqual(list(df.columns), ['open', 'high', 'low', 'close', 'volume', 'datetime'])
+            self.assertEqual(str(df['datetime'][0]), '1970-01-01 00:00:00.001000')
+
+            with patch('tdameritrade.client.pa', None):
+                df = tdc.historyDF('aapl')
+            self.assertEqual(list(df.columns), ['open', 'high', 'low', 'close', 'volume', 'datetime'])
+            self.assertEqual(str(df['datetime'][0]), '1970-01-01 00:00:00.001000')
+
+    @unittest.skipIf(pa is None, 'pyarrow is not installed')
+    @patch('tdameritrade.TDClient._updateAccessTokenIfExpired')
+    def test_historyDF_paths_match(self, mock_rtie):
+        from tdameritrade import TDClient
+
+        tdc = TDClient(clientId=123, refreshToken='reftoken')
+
+        candles = [{'open': 1, 'high': 2, 'low': 1, 'close': 2, 'volume': 100, 'datetime': 1},
+                   {'open': 2, 'high': 3, 'low': 1, 'close': 3, 'datetime': 2}]
+        with patch('httpx.Client.get') as m:
+            m.return_value.status_code = 200
+            m.return_value.content = orjson.dumps({'candles': candles})
+            arrow = tdc.historyDF('aapl')
+            with patch('tdameritrade.client.pa', None):
+                fallback = tdc.historyDF('aapl')
+
+        self.assertEqual(list(fallback.dtypes), list(arrow.dtypes))
+        pd.testing.assert_frame_equal(fallback, arrow)
 
     def test_movers(self):
         from tdameritrade import TDClient
@@ -111,6 +248,31 @@ class TestClient(unittest.TestCase):
         tdc = TDClient(clientId=123, refreshToken='reftoken',
                        accountIds=[1, 2])
 
-        with patch('requests.get') as m:
+        with patch('httpx.Client.get') as m:
+            m.return_value.status_code = 200
+            m.return_value.content = orjson.dumps({'aapl': ['test']})
+
+    @patch('tdameritrade.TDClient._updateAccessTokenIfExpired')
+    def test_options(self, mock_rtie):
+        from tdameritrade import TDClient
+
+        tdc = TDClient(clientId=123, refreshToken='reftoken',
+                       accountIds=[1, 2])
+
+        contract = {'putCall': 'CALL', 'strikePrice': 100.0,
+                    'tradeTimeInLong': 1, 'quoteTimeInLong': 2,
+                    'expirationDate': 3, 'lastTradingDay': 4}
+        put = dict(contract, putCall='PUT')
+        del put['lastTradingDay']
+        chain = {'callExpDateMap': {'2020-01-17:3': {'100.0': [contract]}},
+                 'putExpDateMap': {'2020-01-17:3': {'100.0': [put]}}}
+
+        with patch('httpx.Client.get') as m:
             m.return_value.status_code = 200
-            m.return_value.json.return_value = {'aapl': {'test'}}
+            m.return_value.content = orjson.dumps(chain)
+            df = tdc.optionsDF('aapl')
+
+        self.assertEqual(list(df['putCall']), ['CALL', 'PUT'])
+        self.assertEqual(list(df['strikePrice']), [100.0, 100.0])
+        self.assertEqual(str(df['expirationDate'][0]), '1970-01-01 00:00:00.003000')
+        self.assertTrue(pd.isnull(df['lastTradingDay'][1]))
@@ -1,4 +1,5 @@
 BASE = 'https://api.tdameritrade.com/v1/'
+TOKEN = BASE + 'oauth2/token'
 ACCOUNTS = BASE + 'accounts/'
 SEARCH = BASE + 'instruments'
 INSTRUMENTS = SEARCH + '/'
@@ -8,3 +9,9 @@ OPTIONCHAIN = BASE + 'marketdata/chains'
 MOVERS = BASE + 'marketdata/%s/movers'
 ORDERS = BASE + 'accounts/%s/orders'
 ORDER_REPLACE = ORDERS + '/%s'
+
+# Prebound formatters for the templated endpoints
+HISTORY_FMT = HISTORY.replace('%s', '{}').format
+MOVERS_FMT = MOVERS.replace('%s', '{}').format
+ORDERS_FMT = ORDERS.replace('%s', '{}').format
+ORDER_REPLACE_FMT = ORDER_REPLACE.replace('%s', '{}').format